@@ -10,113 +10,359 @@ This script helps you obtain a Zoom OAuth access token by:
 5. Saving it to a .env file
 """
 
-import requests
-import webbrowser
-from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
-import threading
+import selectors
+import socket
 import sys
 import os
+import time
 import base64
+import tempfile
+from typing import Optional, Tuple
 
 
-class OAuthCallbackHandler(BaseHTTPRequestHandler):
-    """Handle the OAuth callback from Zoom"""
+# Treat tokens this close to expiry as already expired
+TOKEN_EXPIRY_SKEW = 60
+
+# Listen backlog for the OAuth callback socket
+CALLBACK_BACKLOG = 128
+
+# (connect, read) timeouts for calls to the Zoom token endpoint
+TOKEN_REQUEST_TIMEOUT = (3.05, 10)
+
+# Pages shown in the browser after the OAuth redirect
+_SUCCESS_HTML = """
+<html>
+<head><title>Authorization Successful</title></head>
+<body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
+    <h1 style="color: #2D8CFF;">✓ Authorization Successful!</h1>
+    <p>You can close this window and return to your terminal.</p>
+</body>
+</html>
+""".encode()
+
+_ERROR_HTML = """
+<html>
+<head><title>Authorization Failed</title></head>
+<body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
+    <h1 style="color: #FF0000;">✗ Authorization Failed</h1>
+    <p>No authorization code received. Please try again.</p>
+</body>
+</html>
+""".encode()
+
+
+def _http_response(status: str, body: bytes) -> bytes:
+    """Frame an HTML body as a complete HTTP/1.1 response"""
+    head = (
+        f"HTTP/1.1 {status}\r\n"
+        f"Content-Type: text/html; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n"
+    )
+    return head.encode() + body
+
+
+# Full callback responses, built once so the handler only has to send them
+_SUCCESS_RESPONSE = _http_response("200 OK", _SUCCESS_HTML)
+_ERROR_RESPONSE = _http_response("400 Bad Request", _ERROR_HTML)
+_NOT_FOUND_RESPONSE = _http_response("404 Not Found", b"")
+
+# Shared session, created on first use so that importing requests doesn't
+# slow down startup before the user has entered anything
+_SESSION = None
+
+
+def _get_session():
+    """
+    Return the shared session so repeated token calls reuse the TLS connection
+    
+    Only connection failures are retried; token POSTs are never resent after
+    Zoom has answered, so a single-use auth code is never replayed.
+    """
+    global _SESSION
+    if _SESSION is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        _SESSION = requests.Session()
+        _SESSION.headers["User-Agent"] = "zoom-emoji-sender/1.0"
+        _SESSION.mount("https://", HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=2,
+            max_retries=Retry(total=2, backoff_factor=0.2)
+        ))
+    return _SESSION
+
+
+def close_session():
+    """Close the shared HTTP session if one was created"""
+    if _SESSION is not None:
+        _SESSION.close()
+
+
+def open_callback_socket(port: int) -> socket.socket:
+    """
+    Open a non-blocking listening socket for the OAuth redirect
+    
+    Args:
+        port: Local port the Zoom app redirects to
+    
+    Returns:
+        The listening socket
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    # Allow an immediate re-run after a crash instead of failing with EADDRINUSE
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setblocking(False)
+    sock.bind(('localhost', port))
+    sock.listen(CALLBACK_BACKLOG)
+    return sock
+
+
+def wait_for_authorization_code(
+    sock: socket.socket,
+    timeout: float = 300
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Wait for the OAuth redirect and extract the authorization code
     
-    authorization_code = None
+    Connections that aren't the redirect (browser preconnects that send
+    nothing, /favicon.ico, ...) are answered and skipped, so only the
+    overall deadline ends the wait early. The listening socket is left
+    for the caller to close.
     
-    def do_GET(self):
-        """Handle GET request from OAuth redirect"""
-        # Parse the authorization code from the URL
-        query_components = parse_qs(urlparse(self.path).query)
+    Args:
+        sock: Listening socket from open_callback_socket()
+        timeout: Seconds to wait for the redirect
+    
+    Returns:
+        (code, error) tuple. On success error is None; otherwise code is
+        None and error is "timeout" or the OAuth error Zoom redirected
+        with (e.g. "access_denied" when the user cancels)
+    """
+    deadline = time.monotonic() + timeout
+    
+    with selectors.DefaultSelector() as sel:
+        sel.register(sock, selectors.EVENT_READ)
         
-        if 'code' in query_components:
-            OAuthCallbackHandler.authorization_code = query_components['code'][0]
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None, "timeout"
+            if not sel.select(timeout=min(remaining, 1.0)):
+                continue
             
-            # Send success response to browser
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
+            try:
+                conn, _ = sock.accept()
+            except BlockingIOError:
+                continue
             
-            success_html = """
-            <html>
-            <head><title>Authorization Successful</title></head>
-            <body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
-                <h1 style="color: #2D8CFF;">✓ Authorization Successful!</h1>
-                <p>You can close this window and return to your terminal.</p>
-            </body>
-            </html>
-            """
-            self.wfile.write(success_html.encode())
-        else:
-            # Send error response
-            self.send_response(400)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
+            with conn:
+                conn.settimeout(min(5, max(deadline - time.monotonic(), 0.1)))
+                # Send the response page as soon as it's written
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                try:
+                    request = conn.recv(4096)
+                except OSError:
+                    # Idle or reset connection, keep waiting for the redirect
+                    continue
+                
+                # Request line looks like "GET /?code=... HTTP/1.1"
+                request_line = request.split(b"\r\n", 1)[0].decode('latin-1')
+                parts = request_line.split()
+                target = parts[1] if len(parts) >= 2 else ""
+                
+                query_components = parse_qs(urlparse(target).query)
+                code = query_components['code'][0] if 'code' in query_components else None
+                error = query_components['error'][0] if 'error' in query_components else None
+                
+                if code is not None:
+                    response = _SUCCESS_RESPONSE
+                elif error is not None:
+                    response = _ERROR_RESPONSE
+                else:
+                    response = _NOT_FOUND_RESPONSE
+                
+                try:
+                    conn.sendall(response)
+                except OSError:
+                    pass
             
-            error_html = """
-            <html>
-            <head><title>Authorization Failed</title></head>
-            <body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
-                <h1 style="color: #FF0000;">✗ Authorization Failed</h1>
-                <p>No authorization code received. Please try again.</p>
-            </body>
-            </html>
-            """
-            self.wfile.write(error_html.encode())
-    
-    def log_message(self, format, *args):
-        """Suppress log messages"""
-        pass
+            if code is not None:
+                return code, None
+            if error is not None:
+                return None, error
 
 
-def exchange_code_for_token(client_id: str, client_secret: str, code: str, redirect_uri: str) -> dict:
+def _basic_auth_header(client_id: str, client_secret: str) -> str:
+    """Build the Basic Auth header value for the Zoom token endpoint"""
+    credentials = f"{client_id}:{client_secret}"
+    encoded_credentials = base64.b64encode(credentials.encode()).decode()
+    return f"Basic {encoded_credentials}"
+
+
+def _request_token(client_id: str, client_secret: str, data: dict) -> dict:
     """
-    Exchange authorization code for access token
+    POST a grant to the Zoom token endpoint
     
     Args:
         client_id: Your Zoom OAuth Client ID
         client_secret: Your Zoom OAuth Client Secret
-        code: Authorization code from OAuth callback
-        redirect_uri: The redirect URI (must match what's configured in Zoom app)
+        data: Form fields for the grant (grant_type, code, refresh_token, ...)
     
     Returns:
-        Dictionary containing access_token, refresh_token, etc.
+        Dictionary containing access_token, refresh_token, etc., plus
+        expires_at (epoch seconds) computed from expires_in
     """
     token_url = "https://zoom.us/oauth/token"
     
-    # Create Basic Auth header
-    credentials = f"{client_id}:{client_secret}"
-    encoded_credentials = base64.b64encode(credentials.encode()).decode()
-    
     headers = {
-        "Authorization": f"Basic {encoded_credentials}",
+        "Authorization": _basic_auth_header(client_id, client_secret),
         "Content-Type": "application/x-www-form-urlencoded"
     }
     
+    issued_at = time.time()
+    response = _get_session().post(token_url, headers=headers, data=data, timeout=TOKEN_REQUEST_TIMEOUT)
+    response.raise_for_status()
+    
+    token_data = response.json()
+    token_data['expires_at'] = issued_at + token_data.get('expires_in', 0)
+    return token_data
+
+
+def exchange_code_for_token(client_id: str, client_secret: str, code: str, redirect_uri: str) -> dict:
+    """
+    Exchange authorization code for access token
+    
+    Args:
+        client_id: Your Zoom OAuth Client ID
+        client_secret: Your Zoom OAuth Client Secret
+        code: Authorization code from OAuth callback
+        redirect_uri: The redirect URI (must match what's configured in Zoom app)
+    
+    Returns:
+        Dictionary containing access_token, refresh_token, etc.
+    """
     data = {
         "grant_type": "authorization_code",
         "code": code,
         "redirect_uri": redirect_uri
     }
     
-    response = requests.post(token_url, headers=headers, data=data)
-    response.raise_for_status()
+    return _request_token(client_id, client_secret, data)
+
+
+def refresh_access_token(client_id: str, client_secret: str, refresh_token: str) -> dict:
+    """
+    Use a refresh token to get a new access token without opening a browser
+    
+    Zoom rotates the refresh token on every call, so both tokens are
+    written back to the .env file immediately.
+    
+    Args:
+        client_id: Your Zoom OAuth Client ID
+        client_secret: Your Zoom OAuth Client Secret
+        refresh_token: The refresh token saved by a previous run
+    
+    Returns:
+        Dictionary containing access_token, refresh_token, etc.
+    """
+    data = {
+        "grant_type": "refresh_token",
+        "refresh_token": refresh_token
+    }
+    
+    token_data = _request_token(client_id, client_secret, data)
+    
+    access_token = token_data.get('access_token')
+    if not access_token:
+        raise ValueError("No access token received in refresh response")
+    
+    # Fall back to the old refresh token if Zoom didn't send a new one
+    save_to_env_file(
+        access_token,
+        token_data.get('refresh_token') or refresh_token,
+        token_data['expires_at']
+    )
+    
+    return token_data
+
+
+def load_env_file() -> dict:
+    """Read key/value pairs from the .env file next to this script"""
+    env_path = os.path.join(os.path.dirname(__file__), '.env')
+    values = {}
+    if os.path.exists(env_path):
+        with open(env_path) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#') and '=' in line:
+                    key, value = line.split('=', 1)
+                    values[key] = value
+    return values
+
+
+def load_cached_token() -> Optional[Tuple[str, str]]:
+    """
+    Return the saved tokens if the access token is still valid
+    
+    The remaining lifetime is computed from ZOOM_ACCESS_TOKEN_EXPIRES_AT
+    on every call, so a stale expires_in is never reused.
+    
+    Returns:
+        (access_token, refresh_token) tuple, or None if missing or near expiry
+    """
+    env = load_env_file()
+    access_token = env.get("ZOOM_ACCESS_TOKEN")
+    if not access_token:
+        return None
+    
+    try:
+        expires_at = int(env.get("ZOOM_ACCESS_TOKEN_EXPIRES_AT", ""))
+    except ValueError:
+        return None
+    
+    if expires_at - time.time() <= TOKEN_EXPIRY_SKEW:
+        return None
     
-    return response.json()
+    return access_token, env.get("ZOOM_REFRESH_TOKEN", "")
 
 
-def save_to_env_file(access_token: str, refresh_token: str = ""):
+def save_to_env_file(access_token: str, refresh_token: str = "", expires_at: float = 0):
     """Save tokens to .env file"""
     env_path = os.path.join(os.path.dirname(__file__), '.env') or '.'
     
-    with open(env_path, 'w') as f:
-        f.write(f"# Zoom OAuth Access Token\n")
-        f.write(f"# Get this from your Zoom OAuth app at https://marketplace.zoom.us/\n")
-        f.write(f"ZOOM_ACCESS_TOKEN={access_token}\n")
-        if refresh_token:
-            f.write(f"\n# Refresh token to get new access tokens when they expire\n")
-            f.write(f"ZOOM_REFRESH_TOKEN={refresh_token}\n")
+    lines = [
+        "# Zoom OAuth Access Token",
+        "# Get this from your Zoom OAuth app at https://marketplace.zoom.us/",
+        f"ZOOM_ACCESS_TOKEN={access_token}",
+    ]
+    if expires_at:
+        lines.append(f"ZOOM_ACCESS_TOKEN_EXPIRES_AT={int(expires_at)}")
+    if refresh_token:
+        lines.append("")
+        lines.append("# Refresh token to get new access tokens when they expire")
+        lines.append(f"ZOOM_REFRESH_TOKEN={refresh_token}")
+    payload = ("\n".join(lines) + "\n").encode()
+    
+    # Write to a fresh private (0600) temp file and rename it over .env so a
+    # crash can never leave a half-written token file behind
+    fd, tmp_path = tempfile.mkstemp(prefix=".env.", suffix=".tmp", dir=os.path.dirname(env_path) or '.')
+    try:
+        try:
+            os.write(fd, payload)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, env_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
     
     print(f"\n✓ Tokens saved to {env_path}")
 
@@ -127,6 +373,53 @@ def main():
     print("ZOOM OAUTH HELPER - GET ACCESS TOKEN")
     print("="*80)
     
+    env = load_env_file()
+    
+    # Nothing to do while the saved access token is still valid
+    if load_cached_token():
+        remaining = int(env["ZOOM_ACCESS_TOKEN_EXPIRES_AT"]) - int(time.time())
+        print(f"\n✓ Saved access token is still valid for {remaining // 60} more minutes.")
+        print("\nYou can now run the emoji sender:")
+        print("  python zoom_emoji_sender.py")
+        return
+    
+    client_id = os.environ.get("ZOOM_CLIENT_ID", "")
+    client_secret = os.environ.get("ZOOM_CLIENT_SECRET", "")
+    # Prefer .env: Zoom rotates refresh tokens and only .env gets the new one
+    saved_refresh_token = env.get("ZOOM_REFRESH_TOKEN") or os.environ.get("ZOOM_REFRESH_TOKEN")
+    
+    # Returning users can skip the browser entirely by refreshing
+    if saved_refresh_token:
+        print("\nFound a saved refresh token. Refreshing access token...")
+        
+        if not client_id:
+            client_id = input("Enter your Zoom OAuth Client ID: ").strip()
+        if not client_secret:
+            client_secret = input("Enter your Zoom OAuth Client Secret: ").strip()
+        
+        if client_id and client_secret:
+            import requests
+            try:
+                token_data = refresh_access_token(client_id, client_secret, saved_refresh_token)
+                access_token = token_data['access_token']
+                print("✓ Access token refreshed!")
+                print(f"\nAccess Token: {access_token[:20]}...{access_token[-20:]}")
+                print(f"Expires in: {token_data.get('expires_in', 0) // 3600} hours")
+                print("\nYou can now run the emoji sender:")
+                print("  python zoom_emoji_sender.py")
+                return
+            except requests.exceptions.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status not in (400, 401):
+                    print(f"\n✗ Error refreshing access token:")
+                    print(f"   {e}")
+                    return
+                print("⚠ Refresh token was rejected. Falling back to browser authorization.")
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"\n✗ Error refreshing access token:")
+                print(f"   {e}")
+                return
+    
     # Get Client ID and Client Secret
     print("\nBefore starting, make sure you have:")
     print("1. Created a Zoom OAuth app at https://marketplace.zoom.us/")
@@ -138,12 +431,14 @@ def main():
     print("3. Set the redirect URI to: http://localhost:3000")
     print()
     
-    client_id = input("Enter your Zoom OAuth Client ID: ").strip()
+    if not client_id:
+        client_id = input("Enter your Zoom OAuth Client ID: ").strip()
     if not client_id:
         print("Error: Client ID is required!")
         return
     
-    client_secret = input("Enter your Zoom OAuth Client Secret: ").strip()
+    if not client_secret:
+        client_secret = input("Enter your Zoom OAuth Client Secret: ").strip()
     if not client_secret:
         print("Error: Client Secret is required!")
         return
@@ -172,11 +467,7 @@ def main():
     print("STEP 1: Starting local server...")
     print("="*80)
     
-    # Start local server in a thread
-    server = HTTPServer(('localhost', port), OAuthCallbackHandler)
-    server_thread = threading.Thread(target=server.handle_request)
-    server_thread.daemon = True
-    server_thread.start()
+    callback_socket = open_callback_socket(port)
     
     print(f"✓ Local server started on {redirect_uri}")
     
@@ -188,6 +479,7 @@ def main():
     
     # Open browser
     try:
+        import webbrowser
         webbrowser.open(auth_url)
         print("✓ Browser opened. Please authorize the app in your browser.")
     except:
@@ -199,11 +491,19 @@ def main():
     print("(Waiting for you to authorize the app in your browser...)")
     
     # Wait for the authorization code
-    server_thread.join(timeout=300)  # Wait up to 5 minutes
+    try:
+        authorization_code, auth_error = wait_for_authorization_code(callback_socket, timeout=300)  # Wait up to 5 minutes
+    finally:
+        callback_socket.close()
     
-    if not OAuthCallbackHandler.authorization_code:
-        print("\n✗ Error: No authorization code received. Please try again.")
-        server.server_close()
+    if auth_error == "timeout":
+        print("\n✗ Error: Timed out waiting for authorization. Please try again.")
+        return
+    if auth_error == "access_denied":
+        print("\n✗ Authorization was cancelled in the browser.")
+        return
+    if not authorization_code:
+        print(f"\n✗ Error: No authorization code received ({auth_error}). Please try again.")
         return
     
     print("✓ Authorization code received!")
@@ -212,11 +512,12 @@ def main():
     print("STEP 4: Exchanging code for access token...")
     print("="*80)
     
+    import requests
     try:
         token_data = exchange_code_for_token(
             client_id=client_id,
             client_secret=client_secret,
-            code=OAuthCallbackHandler.authorization_code,
+            code=authorization_code,
             redirect_uri=redirect_uri
         )
         
@@ -236,7 +537,7 @@ def main():
             print(f"Refresh Token: {refresh_token[:20]}...{refresh_token[-20:]}")
         
         # Save to .env file
-        save_to_env_file(access_token, refresh_token or "")
+        save_to_env_file(access_token, refresh_token or "", token_data['expires_at'])
         
         print("\n" + "="*80)
         print("SUCCESS!")
@@ -244,7 +545,7 @@ def main():
         print("\nYou can now run the emoji sender:")
         print("  python zoom_emoji_sender.py")
         print("\nNote: Access tokens typically expire after 1 hour.")
-        print("      You'll need to run this script again to get a new token.")
+        print("      Run this script again to refresh it without the browser.")
         
     except requests.exceptions.HTTPError as e:
         print(f"\n✗ Error exchanging code for token:")
@@ -253,8 +554,6 @@ def main():
             print(f"   Response: {e.response.text}")
     except Exception as e:
         print(f"\n✗ Unexpected error: {e}")
-    finally:
-        server.server_close()
 
 
 if __name__ == "__main__":
@@ -263,3 +562,5 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\n\nCancelled by user.")
         sys.exit(0)
+    finally:
+        close_session()
@@ -0,0 +1,48 @@
+"""Tests for the cached-token TTL logic in get_access_token.py"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import get_access_token  # noqa: E402
+
+
+NOW = 1_700_000_000
+
+
+class LoadCachedTokenTest(unittest.TestCase):
+    """load_cached_token() should only reuse tokens outside the expiry skew"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+        # load_env_file() reads the .env next to the module's __file__
+        fake_module_path = os.path.join(self.tmp_dir.name, "get_access_token.py")
+        patcher = mock.patch.object(get_access_token, "__file__", fake_module_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_env(self, expires_at: int):
+        with open(os.path.join(self.tmp_dir.name, ".env"), "w") as f:
+            f.write("ZOOM_ACCESS_TOKEN=access\n")
+            f.write(f"ZOOM_ACCESS_TOKEN_EXPIRES_AT={expires_at}\n")
+            f.write("ZOOM_REFRESH_TOKEN=refresh\n")
+
+    def test_valid_token_is_reused(self):
+        self.write_env(NOW + 3600)
+        with mock.patch.object(get_access_token.time, "time", return_value=NOW):
+            self.assertEqual(get_access_token.load_cached_token(), ("access", "refresh"))
+
+    def test_token_within_expiry_skew_is_not_reused(self):
+        self.write_env(NOW + get_access_token.TOKEN_EXPIRY_SKEW)
+        with mock.patch.object(get_access_token.time, "time", return_value=NOW):
+            self.assertIsNone(get_access_token.load_cached_token())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,15 +6,51 @@ This script allows you to spam a Zoom message with emoji reactions using the Zoo
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import os
+import argparse
+import hashlib
+import functools
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any
 import time
 from pathlib import Path
 import random
+import heapq
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+try:
+    import orjson  # Optional: faster JSON encoding/decoding
+except ImportError:
+    orjson = None
 
+
+# Where results that rarely change are cached between runs
+CACHE_DIR = Path.home() / ".cache" / "zoom_emoji_sender"
+CHANNEL_CACHE_TTL = 15 * 60  # seconds
+
+# Non-ASCII characters (basic emoji check); whitespace is ASCII so it never matches
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+
+
+def json_loads(data: bytes) -> Any:
+    """Decode a JSON body, using orjson when it's installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Encode an object as a UTF-8 JSON body, using orjson when it's installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+@functools.lru_cache(maxsize=4096)
 def emoji_to_unicode(emoji: str) -> str:
     """
     Convert emoji to Unicode format (e.g., "😀" -> "U+1F600")
@@ -35,23 +71,135 @@ def emoji_to_unicode(emoji: str) -> str:
         return "-".join([f"U+{cp}" for cp in codepoints])
 
 
+class BackoffRetry(Retry):
+    """
+    urllib3 Retry that also backs off before the first retry
+    
+    Stock Retry retries immediately once and only then starts backing off,
+    which re-hits a rate-limited endpoint at once when Zoom sends no
+    Retry-After. Here retry N waits backoff_factor * 2**N seconds
+    (2s, 4s, 8s, ... with the default factor of 1.0). Each wait is
+    announced so long backoffs don't look like a hang.
+    """
+    
+    def sleep(self, response=None) -> None:
+        wait = None
+        if response is not None and self.respect_retry_after_header:
+            wait = self.get_retry_after(response)
+        if wait is None:
+            wait = self.get_backoff_time()
+        
+        if wait > 0 and self.history:
+            status = self.history[-1].status
+            if status == 429:
+                reason = "Rate limited"
+            elif status:
+                reason = f"Server error {status}"
+            else:
+                reason = "Connection error"
+            attempt = len(self.history)
+            retry_msg = f"retry {attempt}/{attempt + self.total}" if isinstance(self.total, int) else f"retry {attempt}"
+            print(f"⚠ {reason}, waiting {wait:.1f}s before {retry_msg}...")
+        
+        super().sleep(response)
+    
+    def get_backoff_time(self) -> float:
+        # Count consecutive errors since the last redirect
+        consecutive_errors = 0
+        for entry in reversed(self.history):
+            if entry.redirect_location is not None:
+                break
+            consecutive_errors += 1
+        
+        if consecutive_errors == 0:
+            return 0
+        
+        # Instance attribute on urllib3 2.x, class constant on 1.26.x
+        # (DEFAULT_BACKOFF_MAX from 1.26.8, BACKOFF_MAX before that)
+        backoff_max = getattr(self, "backoff_max", None)
+        if backoff_max is None:
+            backoff_max = getattr(Retry, "DEFAULT_BACKOFF_MAX", getattr(Retry, "BACKOFF_MAX", 120))
+        return min(backoff_max, self.backoff_factor * (2 ** consecutive_errors))
+
+
 class ZoomEmojiSender:
     """Handle Zoom API interactions for sending emoji reactions"""
     
     BASE_URL = "https://api.zoom.us/v2"
+    REQUEST_TIMEOUT = 30.0
     
-    def __init__(self, access_token: str):
+    def __init__(
+        self,
+        access_token: str,
+        max_retries: int = 3,
+        backoff_factor: float = 1.0,
+        verbose: bool = False,
+        token_expires_at: Optional[float] = None
+    ):
         """
         Initialize the Zoom Emoji Sender
         
         Args:
             access_token: Your Zoom OAuth access token
+            max_retries: Retries for rate-limited (429) and 5xx responses
+            backoff_factor: Base of the exponential backoff between those retries
+            verbose: Print the full JSON body of API errors
+            token_expires_at: Expiry of the access token (epoch seconds), if
+                known. The user ID is only cached on disk when this is set.
         """
         self.access_token = access_token
+        self.verbose = verbose
+        self.token_expires_at = token_expires_at
         self.headers = {
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json"
         }
+        
+        # Let urllib3 retry rate limits and server errors, honoring Retry-After.
+        # raise_on_status=False hands the final failed response back so
+        # _handle_response can report Zoom's error message.
+        retry = BackoffRetry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset(["GET", "PATCH"]),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        
+        # Keep connections to api.zoom.us alive across calls instead of
+        # paying a TLS handshake per request
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+        
+        self._channels_cache: Dict[str, List[Dict]] = {}
+        self._user_id: Optional[str] = None
+    
+    def close(self) -> None:
+        """Close the underlying HTTP session"""
+        self.session.close()
+    
+    def __enter__(self) -> "ZoomEmojiSender":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        Send a request to the Zoom API over the shared session
+        
+        Args:
+            method: HTTP method ("GET", "PATCH", ...)
+            path: API path relative to BASE_URL (e.g. "/users/me")
+            **kwargs: Passed through to requests (params, json, data, ...)
+            
+        Returns:
+            The requests Response object
+        """
+        kwargs.setdefault("timeout", self.REQUEST_TIMEOUT)
+        return self.session.request(method, f"{self.BASE_URL}{path}", **kwargs)
     
     def _handle_response(self, response: requests.Response) -> None:
         """
@@ -61,7 +209,9 @@ class ZoomEmojiSender:
             response: The requests Response object
             
         Raises:
-            HTTPError: If the response status is not successful
+            HTTPError: If the response status is not successful. When Zoom
+                returns a JSON error body, the parsed body is available as
+                error_data and its code as zoom_code.
         """
         if response.status_code == 204:
             # No content response is valid
@@ -69,48 +219,88 @@ class ZoomEmojiSender:
         
         if not response.ok:
             try:
-                error_data = response.json()
+                error_data = json_loads(response.content)
                 error_message = error_data.get('message', 'Unknown error')
                 error_code = error_data.get('code', response.status_code)
-                raise requests.exceptions.HTTPError(
+                error = requests.exceptions.HTTPError(
                     f"Zoom API Error {error_code}: {error_message}",
                     response=response
                 )
+                error.error_data = error_data
+                error.zoom_code = error_data.get('code')
+                raise error
             except (ValueError, KeyError):
                 # If we can't parse the error, use default
                 response.raise_for_status()
     
     def _handle_api_error(self, error: requests.exceptions.HTTPError) -> None:
         """
-        Log detailed API error information
+        Log detailed API error information (only in verbose mode; callers
+        already report the error message itself)
         
         Args:
             error: The HTTPError exception
         """
-        if hasattr(error, 'response') and error.response is not None:
-            try:
-                error_data = error.response.json()
-                print(f"API Error Details: {json.dumps(error_data, indent=2)}")
-            except:
-                print(f"API Error: {error}")
+        if not self.verbose or getattr(error, 'response', None) is None:
+            return
+        
+        # Reuse the body _handle_response already parsed
+        error_data = getattr(error, 'error_data', None)
+        if error_data is not None:
+            print(f"API Error Details: {json.dumps(error_data, indent=2)}")
+        else:
+            print(f"API Error: {error}")
     
     def get_user_id(self) -> str:
         """
         Get the current user's ID
         
+        The ID never changes for a given token, so it is cached on the
+        instance and, until the token expires, in CACHE_DIR keyed by a hash
+        of the token. Once the token has expired the API is called again,
+        which fails fast on a stale token.
+        
         Returns:
             User ID string
         """
+        if self._user_id is not None:
+            return self._user_id
+        
+        cache_file = CACHE_DIR / "user_ids.json"
+        token_key = hashlib.sha256(self.access_token.encode()).hexdigest()[:16]
+        
         try:
-            response = requests.get(
-                f"{self.BASE_URL}/users/me",
-                headers=self.headers
-            )
+            with open(cache_file, encoding='utf-8') as f:
+                user_ids = json.load(f)
+        except (OSError, ValueError):
+            user_ids = {}
+        
+        entry = user_ids.get(token_key) if isinstance(user_ids, dict) else None
+        if isinstance(entry, dict) and entry.get("expires_at", 0) > time.time():
+            self._user_id = entry["user_id"]
+            return self._user_id
+        
+        try:
+            response = self._request("GET", "/users/me")
             self._handle_response(response)
-            return response.json()["id"]
+            self._user_id = json_loads(response.content)["id"]
         except requests.exceptions.HTTPError as e:
             self._handle_api_error(e)
             raise
+        
+        # Without a known expiry a cached entry could outlive the token
+        if self.token_expires_at is None:
+            return self._user_id
+        
+        # Tokens expire hourly, so only keep the entry for the current one
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump({token_key: {"user_id": self._user_id, "expires_at": self.token_expires_at}}, f)
+        except OSError as e:
+            print(f"Warning: Could not write user ID cache: {e}")
+        
+        return self._user_id
     
     def list_chat_channels(self, user_id: str, page_size: int = 50) -> List[Dict]:
         """
@@ -132,13 +322,13 @@ class ZoomEmojiSender:
                 params["next_page_token"] = next_page_token
             
             try:
-                response = requests.get(
-                    f"{self.BASE_URL}/chat/users/{user_id}/channels",
-                    headers=self.headers,
+                response = self._request(
+                    "GET",
+                    f"/chat/users/{user_id}/channels",
                     params=params
                 )
                 self._handle_response(response)
-                data = response.json()
+                data = json_loads(response.content)
                 
                 all_channels.extend(data.get("channels", []))
                 next_page_token = data.get("next_page_token")
@@ -151,6 +341,48 @@ class ZoomEmojiSender:
         
         return all_channels
     
+    def list_chat_channels_cached(self, user_id: str, refresh: bool = False) -> List[Dict]:
+        """
+        List chat channels, reusing results from this process or a recent run
+        
+        Channel membership rarely changes, so the list is kept in memory and
+        on disk under CACHE_DIR for CHANNEL_CACHE_TTL seconds.
+        
+        Args:
+            user_id: The user's ID
+            refresh: Ignore any cached list and fetch from the API
+            
+        Returns:
+            List of channel dictionaries
+        """
+        if not refresh and user_id in self._channels_cache:
+            return self._channels_cache[user_id]
+        
+        cache_file = CACHE_DIR / f"channels_{user_id}.json"
+        
+        if not refresh:
+            try:
+                if time.time() - cache_file.stat().st_mtime < CHANNEL_CACHE_TTL:
+                    with open(cache_file, encoding='utf-8') as f:
+                        channels = json.load(f)
+                    self._channels_cache[user_id] = channels
+                    return channels
+            except (OSError, ValueError):
+                # Missing or unreadable cache, fetch from the API instead
+                pass
+        
+        channels = self.list_chat_channels(user_id)
+        self._channels_cache[user_id] = channels
+        
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump(channels, f)
+        except OSError as e:
+            print(f"Warning: Could not write channel cache: {e}")
+        
+        return channels
+    
     def list_recent_messages(
         self, 
         user_id: str, 
@@ -194,13 +426,13 @@ class ZoomEmojiSender:
                 params["next_page_token"] = next_page_token
             
             try:
-                response = requests.get(
-                    f"{self.BASE_URL}/chat/users/{user_id}/messages",
-                    headers=self.headers,
+                response = self._request(
+                    "GET",
+                    f"/chat/users/{user_id}/messages",
                     params=params
                 )
                 self._handle_response(response)
-                data = response.json()
+                data = json_loads(response.content)
                 
                 all_messages.extend(data.get("messages", []))
                 next_page_token = data.get("next_page_token")
@@ -220,7 +452,9 @@ class ZoomEmojiSender:
         emoji: str,
         action: str = "add",
         to_contact: Optional[str] = None,
-        to_channel: Optional[str] = None
+        to_channel: Optional[str] = None,
+        emoji_unicode: Optional[str] = None,
+        body: Optional[bytes] = None
     ) -> Dict:
         """
         Add an emoji reaction to a message
@@ -232,29 +466,37 @@ class ZoomEmojiSender:
             action: "add" or "remove"
             to_contact: Email or user ID of contact (for 1-on-1 chats)
             to_channel: Channel ID (for channel messages)
+            emoji_unicode: Precomputed Unicode form of the emoji (computed if not given)
+            body: Pre-serialized JSON request body; when given, action,
+                to_contact and to_channel are taken from it instead
             
         Returns:
             Response dictionary
         """
         # Prepare request body
         # Convert emoji to Unicode format (e.g., "😀" -> "U+1F600")
-        emoji_unicode = emoji_to_unicode(emoji)
-        data = {
-            "action": action,
-            "emoji": emoji_unicode
-        }
+        if emoji_unicode is None:
+            emoji_unicode = emoji_to_unicode(emoji)
         
-        # Add to_contact or to_channel to the request body (required by API)
-        if to_contact:
-            data["to_contact"] = to_contact
-        if to_channel:
-            data["to_channel"] = to_channel
+        if body is None:
+            data = {
+                "action": action,
+                "emoji": emoji_unicode
+            }
+            
+            # Add to_contact or to_channel to the request body (required by API)
+            if to_contact:
+                data["to_contact"] = to_contact
+            if to_channel:
+                data["to_channel"] = to_channel
+            
+            body = json_dumps(data)
         
         try:
-            response = requests.patch(
-                f"{self.BASE_URL}/chat/users/{user_id}/messages/{message_id}/emoji_reactions",
-                headers=self.headers,
-                json=data
+            response = self._request(
+                "PATCH",
+                f"/chat/users/{user_id}/messages/{message_id}/emoji_reactions",
+                data=body
             )
             self._handle_response(response)
             
@@ -262,13 +504,49 @@ class ZoomEmojiSender:
             if response.status_code == 204:
                 return {"success": True, "emoji": emoji, "emoji_unicode": emoji_unicode}
             
-            result = response.json()
+            result = json_loads(response.content)
             result["emoji"] = emoji  # Keep original emoji for display
             return result
         except requests.exceptions.HTTPError as e:
             self._handle_api_error(e)
             raise
     
+    def _add_emoji_reaction_with_retry(
+        self,
+        user_id: str,
+        message_id: str,
+        emoji: str,
+        max_retries: int,
+        delay: float,
+        **kwargs
+    ) -> Dict:
+        """
+        Add an emoji reaction, retrying on Zoom's internal error (5301)
+        
+        HTTP-level retries (429, 5xx) are handled by the session; 5301 is an
+        application error code, so it's retried here.
+        
+        Args:
+            user_id: The user's ID (use "me" for current user)
+            message_id: The message ID to react to
+            emoji: The emoji to add
+            max_retries: Maximum number of retries for internal errors
+            delay: Base delay in seconds; each retry waits twice this
+            **kwargs: Passed through to add_emoji_reaction
+            
+        Returns:
+            Response dictionary
+        """
+        for attempt in range(max_retries + 1):
+            try:
+                return self.add_emoji_reaction(user_id, message_id, emoji, **kwargs)
+            except requests.exceptions.HTTPError as e:
+                if getattr(e, 'zoom_code', None) != 5301 or attempt == max_retries:
+                    raise
+                wait_time = delay * 2
+                print(f"⚠ Internal error, waiting {wait_time:.1f}s before retry {attempt + 1}/{max_retries}...")
+                time.sleep(wait_time)
+    
     def spam_emojis(
         self,
         user_id: str,
@@ -288,78 +566,61 @@ class ZoomEmojiSender:
             user_id: The user's ID (use "me" for current user)
             message_id: The message ID to react to
             emojis: List of emojis to send
-            delay: Delay in seconds between each emoji (default 1.0s = 1 req/sec to stay under 2/sec limit)
+            delay: Seconds between the start of consecutive requests (default 1.0s = 1 req/sec to stay under 2/sec limit).
+                Time spent waiting on the network counts towards the delay.
             to_contact: Email or user ID of contact (for 1-on-1 chats)
             to_channel: Channel ID (for channel messages)
-            max_retries: Maximum number of retries for failed requests
+            max_retries: Maximum number of retries for Zoom internal errors (5301).
+                Rate limits and 5xx responses are retried by the session, which
+                prints a notice before each wait.
             
         Returns:
             List of response dictionaries
         """
         results = []
+        next_send = time.monotonic()
+        unicode_map = {emoji: emoji_to_unicode(emoji) for emoji in set(emojis)}
+        
+        # Serialize each distinct PATCH body once; only the emoji changes
+        template: Dict[str, str] = {"action": "add", "emoji": ""}
+        if to_contact:
+            template["to_contact"] = to_contact
+        if to_channel:
+            template["to_channel"] = to_channel
+        
+        payloads = {}
+        for emoji, emoji_unicode in unicode_map.items():
+            template["emoji"] = emoji_unicode
+            payloads[emoji] = json_dumps(template)
         
         for emoji in emojis:
-            success = False
-            retry_count = 0
+            # Pace request start times instead of sleeping after each
+            # response, so round-trip time is absorbed into the delay
+            pause = next_send - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            next_send = time.monotonic() + delay
             
-            while not success and retry_count <= max_retries:
-                try:
-                    result = self.add_emoji_reaction(
-                        user_id, 
-                        message_id, 
-                        emoji,
-                        to_contact=to_contact,
-                        to_channel=to_channel
-                    )
-                    results.append({"emoji": emoji, "success": True, "response": result})
-                    retry_msg = f" (retry {retry_count})" if retry_count > 0 else ""
-                    print(f"✓ Added {emoji}{retry_msg}")
-                    success = True
-                    time.sleep(delay)
-                    
-                except requests.exceptions.HTTPError as e:
-                    error_code = str(e)
-                    
-                    # Handle rate limiting (429)
-                    if "429" in error_code:
-                        retry_count += 1
-                        if retry_count <= max_retries:
-                            wait_time = delay * (2 ** retry_count)  # Exponential backoff
-                            print(f"⚠ Rate limited, waiting {wait_time:.1f}s before retry {retry_count}/{max_retries}...")
-                            time.sleep(wait_time)
-                        else:
-                            results.append({
-                                "emoji": emoji, 
-                                "success": False, 
-                                "error": str(e)
-                            })
-                            print(f"✗ Failed to add {emoji} after {max_retries} retries: {e}")
-                    
-                    # Handle internal errors (5301)
-                    elif "5301" in error_code:
-                        retry_count += 1
-                        if retry_count <= max_retries:
-                            wait_time = delay * 2
-                            print(f"⚠ Internal error, waiting {wait_time:.1f}s before retry {retry_count}/{max_retries}...")
-                            time.sleep(wait_time)
-                        else:
-                            results.append({
-                                "emoji": emoji, 
-                                "success": False, 
-                                "error": str(e)
-                            })
-                            print(f"✗ Failed to add {emoji} after {max_retries} retries: {e}")
-                    
-                    # Handle other errors (no retry)
-                    else:
-                        results.append({
-                            "emoji": emoji, 
-                            "success": False, 
-                            "error": str(e)
-                        })
-                        print(f"✗ Failed to add {emoji}: {e}")
-                        success = True  # Don't retry
-                        time.sleep(delay)
+            try:
+                result = self._add_emoji_reaction_with_retry(
+                    user_id, 
+                    message_id, 
+                    emoji,
+                    max_retries,
+                    delay,
+                    emoji_unicode=unicode_map[emoji],
+                    body=payloads[emoji]
+                )
+                results.append({"emoji": emoji, "success": True, "response": result})
+                print(f"✓ Added {emoji}")
+                
+            except requests.exceptions.HTTPError as e:
+                results.append({
+                    "emoji": emoji, 
+                    "success": False, 
+                    "error": str(e)
+                })
+                print(f"✗ Failed to add {emoji}: {e}")
         
         return results
 
@@ -407,21 +668,9 @@ def load_zoom_emojis(file_path: str = "zoom_supported_emojis.txt") -> List[str]:
         with open(emoji_file, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        # Extract all emojis from the file
-        # Split by spaces and filter out empty strings
-        emojis = []
-        for char in content:
-            # Check if character is an emoji (basic check for non-ASCII printable)
-            if ord(char) > 127 and char not in ['\n', '\r', '\t', ' ']:
-                emojis.append(char)
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_emojis = []
-        for emoji in emojis:
-            if emoji not in seen:
-                seen.add(emoji)
-                unique_emojis.append(emoji)
+        # Extract all emojis from the file in a single regex scan;
+        # dict.fromkeys removes duplicates while preserving order
+        unique_emojis = list(dict.fromkeys(_NON_ASCII.findall(content)))
         
         print(f"Loaded {len(unique_emojis)} unique emojis from {file_path}")
         return unique_emojis
@@ -434,7 +683,7 @@ def load_zoom_emojis(file_path: str = "zoom_supported_emojis.txt") -> List[str]:
 
 def get_popular_emojis() -> List[str]:
     """Return a comprehensive list of popular emojis (fallback)"""
-    return [
+    emojis = [
         # Smileys & Emotion
         "😀", "😃", "😄", "😁", "😆", "😅", "🤣", "😂",
         "🙂", "🙃", "😉", "😊", "😇", "🥰", "😍", "🤩",
@@ -512,10 +761,28 @@ def get_popular_emojis() -> List[str]:
         "💲", "💱", "™️", "©️", "®️", "〰️", "➰", "➿",
         "🔚", "🔙", "🔛", "🔝", "🔜", "✔️", "☑️", "🔘",
     ]
+    
+    # Some emojis appear in more than one category; drop repeats in one pass
+    # so the fallback matches the file loader's de-duplicated output
+    return list(dict.fromkeys(emojis))
+
 
+# Keys from .env that this script actually reads
+ENV_KEYS = ("ZOOM_ACCESS_TOKEN",)
 
-def load_env_file():
-    """Load environment variables from .env file"""
+
+def load_env_file() -> Dict[str, str]:
+    """
+    Load settings from the .env file
+    
+    Only the keys in ENV_KEYS are copied into os.environ (in one update),
+    so unrelated .env entries such as the refresh token stay out of the
+    process environment.
+    
+    Returns:
+        Dictionary of all key/value pairs in the file
+    """
+    values: Dict[str, str] = {}
     env_file = Path(__file__).parent / '.env'
     if env_file.exists():
         with open(env_file) as f:
@@ -523,17 +790,33 @@ def load_env_file():
                 line = line.strip()
                 if line and not line.startswith('#') and '=' in line:
                     key, value = line.split('=', 1)
-                    os.environ[key] = value
+                    values[key] = value
+    
+    os.environ.update({key: values[key] for key in ENV_KEYS if key in values})
+    return values
 
 
 def main():
     """Main function to run the emoji sender"""
+    parser = argparse.ArgumentParser(description="Send multiple emoji reactions to a Zoom Team Chat message")
+    parser.add_argument(
+        "--refresh-channels",
+        action="store_true",
+        help="ignore the cached channel list and fetch it again"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="print full API error details"
+    )
+    args = parser.parse_args()
+    
     print("="*80)
     print("ZOOM EMOJI SENDER")
     print("="*80)
     
     # Load .env file
-    load_env_file()
+    env = load_env_file()
     
     # Get access token from environment or user input
     access_token = os.environ.get("ZOOM_ACCESS_TOKEN")
@@ -547,224 +830,236 @@ def main():
         print("Error: Access token is required!")
         return
     
-    # Initialize the sender
-    sender = ZoomEmojiSender(access_token)
+    # The saved expiry only applies if the token came from the .env file
+    token_expires_at = None
+    if access_token == env.get("ZOOM_ACCESS_TOKEN"):
+        try:
+            token_expires_at = float(env.get("ZOOM_ACCESS_TOKEN_EXPIRES_AT", ""))
+        except ValueError:
+            pass
     
-    try:
-        # Get user ID
-        print("\nFetching user information...")
-        user_id = sender.get_user_id()
-        print(f"User ID: {user_id}")
-        
-        # Option to view channels
-        print("\nWould you like to:")
-        print("1. View recent messages from all chats")
-        print("2. View messages from a specific channel")
-        print("3. Enter a message ID directly")
-        choice = input("\nEnter choice (1/2/3): ").strip()
-        
-        messages = []
-        message_id = None
-        to_channel = None
-        to_contact = None
-        
-        if choice == "1":
-            # Get recent messages from all channels
-            print("\nFetching channels...")
-            channels = sender.list_chat_channels(user_id)
-            
-            if not channels:
-                print("No channels found!")
-                return
+    # Initialize the sender
+    with ZoomEmojiSender(access_token, verbose=args.verbose, token_expires_at=token_expires_at) as sender:
+        try:
+            # Get user ID
+            print("\nFetching user information...")
+            user_id = sender.get_user_id()
+            print(f"User ID: {user_id}")
             
-            print(f"Found {len(channels)} channels. Fetching recent messages...")
-            date_from = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+            # Option to view channels
+            print("\nWould you like to:")
+            print("1. View recent messages from all chats")
+            print("2. View messages from a specific channel")
+            print("3. Enter a message ID directly")
+            choice = input("\nEnter choice (1/2/3): ").strip()
             
-            # Fetch messages from all channels
             messages = []
-            for channel in channels:
-                try:
-                    channel_messages = sender.list_recent_messages(
-                        user_id=user_id,
-                        to_channel=channel["id"],
-                        page_size=10,
-                        date_from=date_from
-                    )
-                    # Tag each message with its channel ID
-                    for msg in channel_messages:
-                        msg["_channel_id"] = channel["id"]
-                    messages.extend(channel_messages)
-                except Exception as e:
-                    # Skip channels that error out
-                    print(f"Warning: Could not fetch messages from {channel.get('name', 'Unknown')}: {e}")
-                    continue
-            
-            if not messages:
-                print("No recent messages found!")
-                return
+            message_id = None
+            to_channel = None
+            to_contact = None
             
-            # Sort by date (most recent first)
-            messages.sort(key=lambda x: x.get("date_time", ""), reverse=True)
+            if choice == "1":
+                # Get recent messages from all channels
+                print("\nFetching channels...")
+                channels = sender.list_chat_channels_cached(user_id, refresh=args.refresh_channels)
+                
+                if not channels:
+                    print("No channels found!")
+                    return
+                
+                print(f"Found {len(channels)} channels. Fetching recent messages...")
+                date_from = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+                
+                # Fetch messages from all channels in parallel
+                # (the session's connection pool is sized for these workers)
+                messages = []
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    futures = {
+                        executor.submit(
+                            sender.list_recent_messages,
+                            user_id=user_id,
+                            to_channel=channel["id"],
+                            page_size=10,
+                            date_from=date_from
+                        ): channel
+                        for channel in channels
+                    }
+                    for future in as_completed(futures):
+                        channel = futures[future]
+                        try:
+                            channel_messages = future.result()
+                        except Exception as e:
+                            # Skip channels that error out
+                            print(f"Warning: Could not fetch messages from {channel.get('name', 'Unknown')}: {e}")
+                            continue
+                        # Tag each message with its channel ID
+                        for msg in channel_messages:
+                            msg["_channel_id"] = channel["id"]
+                        messages.extend(channel_messages)
+                
+                if not messages:
+                    print("No recent messages found!")
+                    return
+                
+                # Keep the 20 most recent messages, newest first
+                messages = heapq.nlargest(20, messages, key=lambda x: x.get("date_time", ""))
+                
+                # Display messages
+                display_messages(messages)
+                
+                # Select message
+                msg_num = input("\nEnter the message number to spam with emojis: ").strip()
+                try:
+                    msg_idx = int(msg_num) - 1
+                    message_id = messages[msg_idx]["id"]
+                    to_channel = messages[msg_idx].get("_channel_id")
+                except (ValueError, IndexError):
+                    print("Invalid message number!")
+                    return
             
-            # Limit to most recent 20 messages
-            messages = messages[:20]
+            elif choice == "2":
+                # List channels
+                print("\nFetching channels...")
+                channels = sender.list_chat_channels_cached(user_id, refresh=args.refresh_channels)
+                
+                if not channels:
+                    print("No channels found!")
+                    return
+                
+                print("\nAvailable channels:")
+                for idx, channel in enumerate(channels, 1):
+                    print(f"[{idx}] {channel.get('name', 'Unnamed')} (ID: {channel.get('id', '')})")
+                
+                # Select channel
+                channel_num = input("\nEnter channel number: ").strip()
+                try:
+                    channel_idx = int(channel_num) - 1
+                    to_channel = channels[channel_idx]["id"]
+                except (ValueError, IndexError):
+                    print("Invalid channel number!")
+                    return
+                
+                # Get messages from channel
+                print(f"\nFetching messages from channel...")
+                date_from = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
+                messages = sender.list_recent_messages(
+                    user_id=user_id,
+                    to_channel=to_channel,
+                    page_size=20,
+                    date_from=date_from
+                )
+                
+                if not messages:
+                    print("No messages found in this channel!")
+                    return
+                
+                # Display messages
+                display_messages(messages)
+                
+                # Select message
+                msg_num = input("\nEnter the message number to spam with emojis: ").strip()
+                try:
+                    msg_idx = int(msg_num) - 1
+                    message_id = messages[msg_idx]["id"]
+                except (ValueError, IndexError):
+                    print("Invalid message number!")
+                    return
             
-            # Display messages
-            display_messages(messages)
+            elif choice == "3":
+                message_id = input("\nEnter the message ID: ").strip()
             
-            # Select message
-            msg_num = input("\nEnter the message number to spam with emojis: ").strip()
-            try:
-                msg_idx = int(msg_num) - 1
-                message_id = messages[msg_idx]["id"]
-                to_channel = messages[msg_idx].get("_channel_id")
-            except (ValueError, IndexError):
-                print("Invalid message number!")
+            else:
+                print("Invalid choice!")
                 return
-        
-        elif choice == "2":
-            # List channels
-            print("\nFetching channels...")
-            channels = sender.list_chat_channels(user_id)
             
-            if not channels:
-                print("No channels found!")
+            if not message_id:
+                print("Error: No message ID provided!")
                 return
             
-            print("\nAvailable channels:")
-            for idx, channel in enumerate(channels, 1):
-                print(f"[{idx}] {channel.get('name', 'Unnamed')} (ID: {channel.get('id', '')})")
+            # Load emojis from file
+            all_emojis = load_zoom_emojis()
             
-            # Select channel
-            channel_num = input("\nEnter channel number: ").strip()
-            try:
-                channel_idx = int(channel_num) - 1
-                to_channel = channels[channel_idx]["id"]
-            except (ValueError, IndexError):
-                print("Invalid channel number!")
-                return
+            # Select emojis
+            print("\nEmoji options:")
+            print(f"1. Use all supported emojis ({len(all_emojis)} emojis)")
+            print("2. Random selection (specify count)")
+            print("3. Enter custom emojis")
+            emoji_choice = input("\nEnter choice (1/2/3): ").strip()
             
-            # Get messages from channel
-            print(f"\nFetching messages from channel...")
-            date_from = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-            messages = sender.list_recent_messages(
-                user_id=user_id,
-                to_channel=to_channel,
-                page_size=20,
-                date_from=date_from
-            )
+            emojis = []
             
-            if not messages:
-                print("No messages found in this channel!")
+            if emoji_choice == "1":
+                emojis = all_emojis
+                print(f"\nUsing all {len(emojis)} supported emojis!")
+            elif emoji_choice == "2":
+                # Ask user for number of random emojis
+                while True:
+                    count_input = input(f"\nHow many random emojis? (1-{len(all_emojis)}): ").strip()
+                    try:
+                        count = int(count_input)
+                        if 1 <= count <= len(all_emojis):
+                            emojis = random.sample(all_emojis, count)
+                            print(f"\nRandomly selected {count} emojis!")
+                            print(f"Sample: {' '.join(emojis[:20])}" + (" ..." if len(emojis) > 20 else ""))
+                            break
+                        else:
+                            print(f"Please enter a number between 1 and {len(all_emojis)}")
+                    except ValueError:
+                        print("Invalid input. Please enter a number.")
+            elif emoji_choice == "3":
+                print("\nEnter emojis separated by spaces (e.g., 😀 😃 😄 👍 ❤️):")
+                emoji_input = input("> ").strip()
+                emojis = emoji_input.split()
+                if not emojis:
+                    print("No emojis provided!")
+                    return
+            else:
+                print("Invalid choice!")
                 return
             
-            # Display messages
-            display_messages(messages)
+            # Confirm
+            print(f"\nAbout to send {len(emojis)} emoji reactions to message ID: {message_id}")
+            print("Sample emojis:", " ".join(emojis[:10]))
             
-            # Select message
-            msg_num = input("\nEnter the message number to spam with emojis: ").strip()
-            try:
-                msg_idx = int(msg_num) - 1
-                message_id = messages[msg_idx]["id"]
-            except (ValueError, IndexError):
-                print("Invalid message number!")
-                return
-        
-        elif choice == "3":
-            message_id = input("\nEnter the message ID: ").strip()
-        
-        else:
-            print("Invalid choice!")
-            return
-        
-        if not message_id:
-            print("Error: No message ID provided!")
-            return
-        
-        # Load emojis from file
-        all_emojis = load_zoom_emojis()
-        
-        # Select emojis
-        print("\nEmoji options:")
-        print(f"1. Use all supported emojis ({len(all_emojis)} emojis)")
-        print("2. Random selection (specify count)")
-        print("3. Enter custom emojis")
-        emoji_choice = input("\nEnter choice (1/2/3): ").strip()
-        
-        emojis = []
-        
-        if emoji_choice == "1":
-            emojis = all_emojis
-            print(f"\nUsing all {len(emojis)} supported emojis!")
-        elif emoji_choice == "2":
-            # Ask user for number of random emojis
-            while True:
-                count_input = input(f"\nHow many random emojis? (1-{len(all_emojis)}): ").strip()
-                try:
-                    count = int(count_input)
-                    if 1 <= count <= len(all_emojis):
-                        emojis = random.sample(all_emojis, count)
-                        print(f"\nRandomly selected {count} emojis!")
-                        print(f"Sample: {' '.join(emojis[:20])}" + (" ..." if len(emojis) > 20 else ""))
-                        break
-                    else:
-                        print(f"Please enter a number between 1 and {len(all_emojis)}")
-                except ValueError:
-                    print("Invalid input. Please enter a number.")
-        elif emoji_choice == "3":
-            print("\nEnter emojis separated by spaces (e.g., 😀 😃 😄 👍 ❤️):")
-            emoji_input = input("> ").strip()
-            emojis = emoji_input.split()
-            if not emojis:
-                print("No emojis provided!")
+            # Rate limit warning
+            if len(emojis) > 2000:
+                print(f"\n⚠️  WARNING: You're trying to send {len(emojis)} reactions.")
+                print("    Daily rate limit is 2000 requests/day. This will exceed the limit!")
+                print("    Consider reducing the number of emojis.")
+            
+            estimated_time = len(emojis) * 1.0 / 60  # minutes
+            print(f"\nEstimated time: {estimated_time:.1f} minutes (rate limit: 1 req/sec)")
+            
+            confirm = input("\nProceed? (yes/no): ").strip().lower()
+            
+            if confirm not in ["yes", "y"]:
+                print("Cancelled.")
                 return
-        else:
-            print("Invalid choice!")
-            return
-        
-        # Confirm
-        print(f"\nAbout to send {len(emojis)} emoji reactions to message ID: {message_id}")
-        print("Sample emojis:", " ".join(emojis[:10]))
-        
-        # Rate limit warning
-        if len(emojis) > 2000:
-            print(f"\n⚠️  WARNING: You're trying to send {len(emojis)} reactions.")
-            print("    Daily rate limit is 2000 requests/day. This will exceed the limit!")
-            print("    Consider reducing the number of emojis.")
-        
-        estimated_time = len(emojis) * 1.0 / 60  # minutes
-        print(f"\nEstimated time: {estimated_time:.1f} minutes (rate limit: 1 req/sec)")
-        
-        confirm = input("\nProceed? (yes/no): ").strip().lower()
-        
-        if confirm not in ["yes", "y"]:
-            print("Cancelled.")
-            return
-        
-        # Send emojis
-        print(f"\nSending {len(emojis)} emoji reactions...")
-        print("-"*80)
-        results = sender.spam_emojis(
-            user_id, 
-            message_id, 
-            emojis,
-            to_contact=to_contact,
-            to_channel=to_channel
-        )
-        print("-"*80)
-        
-        # Summary
-        success_count = sum(1 for r in results if r["success"])
-        print(f"\n✓ Successfully sent {success_count}/{len(emojis)} emoji reactions!")
+            
+            # Send emojis
+            print(f"\nSending {len(emojis)} emoji reactions...")
+            print("-"*80)
+            results = sender.spam_emojis(
+                user_id, 
+                message_id, 
+                emojis,
+                to_contact=to_contact,
+                to_channel=to_channel
+            )
+            print("-"*80)
+            
+            # Summary
+            success_count = sum(1 for r in results if r["success"])
+            print(f"\n✓ Successfully sent {success_count}/{len(emojis)} emoji reactions!")
+            
+            if success_count < len(emojis):
+                print(f"✗ Failed to send {len(emojis) - success_count} reactions")
         
-        if success_count < len(emojis):
-            print(f"✗ Failed to send {len(emojis) - success_count} reactions")
-    
-    except requests.exceptions.HTTPError as e:
-        print(f"\nAPI Error: {e}")
-        print(f"Response: {e.response.text if hasattr(e, 'response') else 'N/A'}")
-    except Exception as e:
-        print(f"\nError: {e}")
+        except requests.exceptions.HTTPError as e:
+            print(f"\nAPI Error: {e}")
+            print(f"Response: {e.response.text if hasattr(e, 'response') else 'N/A'}")
+        except Exception as e:
+            print(f"\nError: {e}")
 
 
 if __name__ == "__main__":